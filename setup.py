@@ -15,11 +15,12 @@ setuptools.setup(
     author_email='joelspadin@gmail.com',
     license='MIT',
     packages=setuptools.find_packages(),
+    python_requires='>=3.8',
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Operating System :: Microsoft :: Windows',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
         'Topic :: Text Editors :: Integrated Development Environments (IDE)',
     ],
     zip_safe=False)
\ No newline at end of file
@@ -7,28 +7,100 @@ release of vswhere from https://github.com/Microsoft/vswhere the first time a
 function is called.
 """
 
+import functools
 import json
 import os
+import re
 import shutil
 import subprocess
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 __version__ = '1.4.0'
 __author__ = 'Joel Spadin'
 __license__ = 'MIT'
 
-LATEST_RELEASE_ENDPOINT = 'https://api.github.com/repos/Microsoft/vswhere/releases/latest'
-DOWNLOAD_PATH = os.path.join(os.path.dirname(__file__), 'vswhere.exe')
+_PACKAGE_DIR = os.path.dirname(__file__)
 
-if 'ProgramFiles(x86)' in os.environ:
-    DEFAULT_PATH = os.path.join(os.environ['ProgramFiles(x86)'], 'Microsoft Visual Studio', 'Installer', 'vswhere.exe')
-else:
-    DEFAULT_PATH = None
+LATEST_RELEASE_ENDPOINT = 'https://api.github.com/repos/Microsoft/vswhere/releases/latest'
+DOWNLOAD_PATH = os.path.join(_PACKAGE_DIR, 'vswhere.exe')
+RELEASE_CACHE_PATH = os.path.join(_PACKAGE_DIR, 'vswhere_release.json')
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+CACHE_TIMEOUT = 5.0
+CACHE_MAX_SIZE = 64
 
 alternate_path = None
 download_mirror_url = None
 
-
-def execute(args):
+_vswhere_path = None
+_default_path = _UNSET = object()
+_output_cache = {}
+_pending_outputs = {}
+_download_lock = threading.Lock()
+
+# Instance properties which vswhere outputs the same way with -property as in
+# its JSON output, so find() can read them from a shared JSON query. Dates
+# such as installDate are formatted for the user's locale by -property, and
+# booleans and numbers are formatted differently, so they are not included.
+_SHARED_PROPERTIES = frozenset(name.lower() for name in (
+    'instanceId',
+    'installationName',
+    'installationPath',
+    'installationVersion',
+    'productId',
+    'productPath',
+    'displayName',
+    'description',
+    'channelId',
+    'channelUri',
+    'enginePath',
+    'releaseNotes',
+    'thirdPartyNotices',
+))
+
+_json_decoder = json.JSONDecoder()
+_JSON_ARRAY_START_RE = re.compile(r'\s*\[\s*')
+
+# Matches the download URL of the vswhere.exe asset in a GitHub release
+# without parsing the rest of the release information.
+_ASSET_URL_RE = re.compile(br'"name"\s*:\s*"vswhere\.exe".*?"browser_download_url"\s*:\s*"([^"\\]+)"', re.DOTALL)
+
+# Arguments passed to vswhere before the caller's arguments.
+_JSON_PREFIX = ('-utf8', '-format', 'json')
+_PROPERTY_PREFIX = ('-utf8',)
+
+# Don't open a console window for vswhere, and skip building the explicit list
+# of handles to inherit that close_fds=True requires on Windows.
+if os.name == 'nt':
+    _SUBPROCESS_ARGS = {'creationflags': subprocess.CREATE_NO_WINDOW, 'close_fds': False}
+else:
+    _SUBPROCESS_ARGS = {}
+
+# Command line arguments for find(), in the same order as its parameters.
+# _FLAG arguments take no value, _VALUE arguments take a single value, and
+# _LIST arguments take a string or a list of strings.
+_FLAG, _VALUE, _LIST = range(3)
+_FIND_ARGS = (
+    ('-find', _VALUE),
+    ('-all', _FLAG),
+    ('-latest', _FLAG),
+    ('-legacy', _FLAG),
+    ('-path', _VALUE),
+    ('-prerelease', _FLAG),
+    ('-products', _LIST),
+    ('-requires', _LIST),
+    ('-requiresAny', _FLAG),
+    ('-sort', _FLAG),
+    ('-version', _VALUE),
+)
+
+
+def execute(args, decode=True):
     """
     Call vswhere with the given arguments and return an array of results.
 
@@ -37,20 +109,162 @@ def execute(args):
     If the argument list contains '-property', this returns an array with the
     property value for each result. Otherwise, this returns an array of
     dictionaries containing the results.
+
+    If `decode` is False, property values are returned as UTF-8 encoded bytes
+    instead of strings. This has no effect if '-property' is not given.
+    """
+    return _parse_output(args, _run_vswhere(args), decode)
+
+
+def _execute_cached(args):
+    """
+    Same as execute(), but reuses the output of a call to vswhere with the
+    same arguments made in the last CACHE_TIMEOUT seconds. Use clear_cache() to
+    discard cached output.
     """
-    is_property = '-property' in args
+    return _parse_output(args, _get_cached_output(args))
+
+
+def _get_cached_output(args):
+    key = tuple(args)
+    output = _get_cache_entry(key)
+
+    if output is None:
+        output = _run_vswhere(args)
+        _set_cache_entry(key, output)
+
+    return output
+
+
+async def _get_cached_output_async(args):
+    # asyncio is only imported once it is needed, since it is slow to import
+    # and is already loaded by the time a coroutine can run.
+    import asyncio
+
+    key = tuple(args)
+    output = _get_cache_entry(key)
+    if output is not None:
+        return output
+
+    # Identical queries that run at the same time, for example from
+    # asyncio.gather(), share a single vswhere process.
+    loop = asyncio.get_running_loop()
+    pending_key = (loop, key)
+    task = _pending_outputs.get(pending_key)
+
+    if task is None:
+        task = loop.create_task(_run_vswhere_async(args))
+        task.add_done_callback(functools.partial(_finish_pending_output, pending_key))
+        _pending_outputs[pending_key] = task
+
+    # Don't cancel the shared task if only one of the callers is cancelled.
+    return await asyncio.shield(task)
+
+
+def _finish_pending_output(pending_key, task):
+    del _pending_outputs[pending_key]
+
+    if not task.cancelled() and task.exception() is None:
+        _set_cache_entry(pending_key[1], task.result())
+
+
+def _get_cache_entry(key):
+    """
+    Get the cached output for the given arguments, or None if there is no
+    output cached in the last CACHE_TIMEOUT seconds.
+    """
+    entry = _output_cache.get(key)
+    if entry is None:
+        return None
+
+    if time.monotonic() - entry[0] >= CACHE_TIMEOUT:
+        _output_cache.pop(key, None)
+        return None
+
+    return entry[1]
+
+
+def _set_cache_entry(key, output):
+    """
+    Cache the output for the given arguments. This also removes any expired
+    entries, and the oldest entries if there are more than CACHE_MAX_SIZE.
+    """
+    now = time.monotonic()
+
+    for old_key, (timestamp, _) in list(_output_cache.items()):
+        if now - timestamp >= CACHE_TIMEOUT:
+            _output_cache.pop(old_key, None)
+
+    # Entries are always added at the end, so the first ones are the oldest.
+    _output_cache.pop(key, None)
+    while len(_output_cache) >= CACHE_MAX_SIZE:
+        _output_cache.pop(next(iter(_output_cache)), None)
+
+    _output_cache[key] = (now, output)
+
+
+def _run_vswhere(args):
+    return subprocess.check_output(_get_vswhere_argv(get_vswhere_path(), args), **_SUBPROCESS_ARGS)
+
+
+async def _run_vswhere_async(args):
+    import asyncio
+
+    # Locating vswhere may need to download it, so don't block the event loop.
+    path = _vswhere_path
+    if path is None:
+        path = await asyncio.get_running_loop().run_in_executor(None, get_vswhere_path)
+
+    argv = _get_vswhere_argv(path, args)
+    process = await asyncio.create_subprocess_exec(*argv, stdout=asyncio.subprocess.PIPE, **_SUBPROCESS_ARGS)
+    output, _ = await process.communicate()
+
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, argv, output)
+
+    return output
 
-    args = [get_vswhere_path(), '-utf8'] + args
 
-    if not is_property:
-        args.extend(['-format', 'json'])
+def _get_vswhere_argv(path, args):
+    argv = [path]
+    argv.extend(_PROPERTY_PREFIX if '-property' in args else _JSON_PREFIX)
+    argv.extend(args)
+    return argv
 
-    output = subprocess.check_output(args).decode('utf-8')
 
-    if is_property:
-        return output.splitlines()
+def _parse_output(args, output, decode=True):
+    if '-property' in args:
+        if decode:
+            return output.decode('utf-8').splitlines()
+        else:
+            return output.splitlines()
+    elif orjson:
+        # orjson decodes UTF-8 itself, so skip decoding to a str first.
+        return orjson.loads(output)
     else:
-        return json.loads(output)
+        return json.loads(output.decode('utf-8'))
+
+
+def _parse_first_item(output):
+    """
+    Get the first item of the JSON array output by vswhere, or None if it is
+    empty.
+
+    orjson is fast enough to parse the whole array. Without it, only the first
+    item is parsed.
+    """
+    if orjson:
+        return next(iter(orjson.loads(output)), None)
+
+    text = output.decode('utf-8')
+    match = _JSON_ARRAY_START_RE.match(text)
+    if not match:
+        return next(iter(json.loads(text)), None)
+
+    if text.startswith(']', match.end()):
+        return None
+
+    return _json_decoder.raw_decode(text, match.end())[0]
 
 
 def find(
@@ -108,52 +322,163 @@ def find(
             *  Matches zero or more characters except "\\"
             ** Searches the current directory and subdirectories for the
                remaining search pattern.
+
+    Results are cached for CACHE_TIMEOUT seconds, for up to CACHE_MAX_SIZE
+    distinct queries, so repeating a query does not call vswhere again. Queries with the same selection options share a single
+    call, even if they request different properties with `prop`, as long as the
+    properties are plain strings such as 'installationPath' or
+    'installationVersion' (see _SHARED_PROPERTIES). Other properties, such as
+    dates, which vswhere formats differently for -property than for JSON, always
+    use a separate call. Use clear_cache() to discard cached results, for
+    example after installing or updating Visual Studio.
+    """
+    args, shared_prop = _get_query(
+        prop,
+        find=find,
+        find_all=find_all,
+        latest=latest,
+        legacy=legacy,
+        path=path,
+        prerelease=prerelease,
+        products=products,
+        requires=requires,
+        requires_any=requires_any,
+        sort=sort,
+        version=version,
+    )
+
+    results = _get_query_results(args, shared_prop, _get_cached_output(args))
+    if results is None:
+        results = _execute_cached(args + ['-property', shared_prop])
+
+    return results
+
+
+def _get_query(prop=None, **kwargs):
+    """
+    Get the command line arguments for a find() query, and the property to read
+    from the JSON output for those arguments.
+
+    If `prop` can't be read from JSON output (see _SHARED_PROPERTIES), the
+    arguments include '-property' and the returned property is None.
+    """
+    args = _get_find_args(**kwargs)
+
+    if prop and not kwargs.get('find') and prop.lower() in _SHARED_PROPERTIES:
+        return args, prop
+
+    if prop:
+        args.append('-property')
+        args.append(prop)
+
+    return args, None
+
+
+def _get_query_results(args, shared_prop, output):
+    """
+    Parse the output for a query from _get_query().
+
+    Returns None if `shared_prop` could not be read from the output, in which
+    case the query must be run again with '-property' added to the arguments.
+    """
+    results = _parse_output(args, output)
+
+    if shared_prop:
+        return _get_property_values(results, shared_prop)
+
+    return results
+
+
+def _get_find_args(
+    find=None,
+    find_all=False,
+    latest=False,
+    legacy=False,
+    path=None,
+    prerelease=False,
+    products=None,
+    requires=None,
+    requires_any=False,
+    sort=False,
+    version=None,
+):
+    """
+    Get the command line arguments for the selection and output options of
+    find(), except for `prop`.
     """
     args = []
+    append = args.append
+    values = (find, find_all, latest, legacy, path, prerelease, products, requires, requires_any, sort, version)
 
-    if find:
-        args.append('-find')
-        args.append(find)
+    for (flag, kind), value in zip(_FIND_ARGS, values):
+        if not value:
+            continue
 
-    if find_all:
-        args.append('-all')
+        append(flag)
 
-    if latest:
-        args.append('-latest')
+        if kind == _VALUE:
+            append(value)
+        elif kind == _LIST:
+            if isinstance(value, str):
+                append(value)
+            else:
+                args.extend(value)
 
-    if legacy:
-        args.append('-legacy')
+    return args
 
-    if path:
-        args.append('-path')
-        args.append(path)
 
-    if prerelease:
-        args.append('-prerelease')
+async def find_async(**kwargs):
+    """
+    Call vswhere asynchronously and return an array of the results.
 
-    if products:
-        args.append('-products')
-        _extend_or_append(args, products)
+    This is the same as find(), but it does not block the event loop while
+    vswhere runs, so several queries can run in parallel with
+    `asyncio.gather()`. It shares cached results with find().
 
-    if prop:
-        args.append('-property')
-        args.append(prop)
+    If vswhere.exe has not been located yet, it is located, and if necessary
+    downloaded, in the event loop's default executor, so that this does not
+    block the event loop either.
+
+    See find() for keyword arguments.
+    """
+    args, shared_prop = _get_query(**kwargs)
+
+    results = _get_query_results(args, shared_prop, await _get_cached_output_async(args))
+    if results is None:
+        args = args + ['-property', shared_prop]
+        results = _parse_output(args, await _get_cached_output_async(args))
+
+    return results
 
-    if requires:
-        args.append('-requires')
-        _extend_or_append(args, requires)
 
-    if requires_any:
-        args.append('-requiresAny')
+def find_many(specs):
+    """
+    Run each of a list of find() queries in turn and return a list with the
+    results of each query.
+
+    Each item in `specs` is a dictionary of keyword arguments to find().
+    vswhere is called at most once for each distinct set of selection options,
+    even if the queries request different properties with `prop` (subject to
+    the same limits as find()) and even if CACHE_TIMEOUT expires partway
+    through. Use find_async() to run queries in parallel.
+    """
+    outputs = {}
+    results = []
+
+    for spec in specs:
+        args, shared_prop = _get_query(**spec)
 
-    if sort:
-        args.append('-sort')
+        key = tuple(args)
+        if key not in outputs:
+            outputs[key] = _get_cached_output(args)
 
-    if version:
-        args.append('-version')
-        args.append(version)
+        result = _get_query_results(args, shared_prop, outputs[key])
+        if result is None:
+            result = _execute_cached(args + ['-property', shared_prop])
 
-    return execute(args)
+        results.append(result)
+
+    return results
 
 
 def find_first(**kwargs):
@@ -162,7 +487,12 @@ def find_first(**kwargs):
 
     See find() for keyword arguments.
     """
-    return next(iter(find(**kwargs)), None)
+    prop = kwargs.pop('prop', None)
+    if prop:
+        return next(iter(find(prop=prop, **kwargs)), None)
+
+    # Only parse the first instance instead of building the whole list.
+    return _parse_first_item(_get_cached_output(_get_find_args(**kwargs)))
 
 
 def get_latest(legacy=None, **kwargs):
@@ -173,7 +503,9 @@ def get_latest(legacy=None, **kwargs):
     different products. If the `legacy` argument is not set, it defaults to
     `True` unless either `products` or `requires` arguments are set.
     """
-    legacy = _get_legacy_arg(legacy, **kwargs)
+    if legacy is None:
+        legacy = 'products' not in kwargs and 'requires' not in kwargs
+
     return find_first(latest=True, legacy=legacy, **kwargs)
 
 
@@ -187,7 +519,9 @@ def get_latest_path(legacy=None, **kwargs):
     different products. If the `legacy` argument is not set, it defaults to
     `True` unless either `products` or `requires` arguments are set.
     """
-    legacy = _get_legacy_arg(legacy, **kwargs)
+    if legacy is None:
+        legacy = 'products' not in kwargs and 'requires' not in kwargs
+
     return find_first(latest=True, legacy=legacy, prop='installationPath', **kwargs)
 
 
@@ -207,9 +541,12 @@ def get_latest_version(legacy=None, **kwargs):
     different products. If the `legacy` argument is not set, it defaults to
     `True` unless either `products` or `requires` arguments are set.
     """
-    legacy = _get_legacy_arg(legacy, **kwargs)
+    if legacy is None:
+        legacy = 'products' not in kwargs and 'requires' not in kwargs
+
     return find_first(latest=True, legacy=legacy, prop='installationVersion', **kwargs)
 
+
 def get_latest_major_version(**kwargs):
     """
     Get the major version of the latest installed version of Visual Studio as an int.
@@ -220,7 +557,11 @@ def get_latest_major_version(**kwargs):
     different products. If the `legacy` argument is not set, it defaults to
     `True` unless either `products` or `requires` arguments are set.
     """
-    return int(next(iter(get_latest_version(**kwargs).split('.')), '0'))
+    latest = get_latest(**kwargs)
+    if not latest:
+        return 0
+
+    return int(latest['installationVersion'].partition('.')[0])
 
 
 def get_vswhere_path():
@@ -230,18 +571,15 @@ def get_vswhere_path():
     If vswhere is not already installed as part of Visual Studio, and no
     alternate path is given using `set_vswhere_path()`, the latest release will
     be downloaded and stored alongside this script.
-    """
-    if alternate_path and os.path.exists(alternate_path):
-        return alternate_path
-
-    if DEFAULT_PATH and os.path.exists(DEFAULT_PATH):
-        return DEFAULT_PATH
 
-    if os.path.exists(DOWNLOAD_PATH):
-        return DOWNLOAD_PATH
+    The result is cached for the lifetime of the process. Calling
+    `set_vswhere_path()` clears the cache.
+    """
+    global _vswhere_path
+    if _vswhere_path is None:
+        _vswhere_path = _find_vswhere_path()
 
-    _download_vswhere()
-    return DOWNLOAD_PATH
+    return _vswhere_path
 
 
 def set_vswhere_path(path):
@@ -249,9 +587,22 @@ def set_vswhere_path(path):
     Set the path to vswhere.exe.
 
     If this is set, it overrides any version installed as part of Visual Studio.
+    This also discards any cached results from the previous vswhere.exe.
     """
-    global alternate_path
+    global alternate_path, _vswhere_path
     alternate_path = path
+    _vswhere_path = None
+    clear_cache()
+
+
+def clear_cache():
+    """
+    Discard all cached results from vswhere.
+
+    Call this if Visual Studio instances may have been installed, updated, or
+    removed since the last query.
+    """
+    _output_cache.clear()
 
 
 def set_download_mirror(url):
@@ -264,54 +615,211 @@ def set_download_mirror(url):
     download_mirror_url = url
 
 
-def _extend_or_append(lst, value):
-    if isinstance(value, str):
-        lst.append(value)
-    else:
-        lst.extend(value)
+def _get_property_values(instances, prop):
+    """
+    Get the value of `prop` from each of a list of instances, using the same
+    lookup rules as vswhere's -property option.
+
+    `prop` must be one of _SHARED_PROPERTIES. Returns None if any value is not
+    a string, since vswhere's text formatting of other values cannot be
+    reproduced exactly.
+    """
+    name = prop.lower()
+    values = []
 
+    for instance in instances:
+        value = next((v for k, v in instance.items() if k.lower() == name), None)
 
-def _get_legacy_arg(legacy, **kwargs):
-    if legacy is None:
-        return 'products' not in kwargs and 'requires' not in kwargs
-    else:
-        return legacy
+        if value is None:
+            continue
+
+        if not isinstance(value, str):
+            return None
+
+        values.append(value)
+
+    return values
+
+
+def _get_default_path():
+    """
+    Get the path to the copy of vswhere installed with Visual Studio, or None
+    if the Program Files (x86) directory is not known.
+
+    If DEFAULT_PATH has been assigned, for example with `vswhere.DEFAULT_PATH =
+    path` or mock.patch(), that value is used instead.
+    """
+    global _default_path
+    if 'DEFAULT_PATH' in globals():
+        return globals()['DEFAULT_PATH']
+
+    if _default_path is _UNSET:
+        program_files = os.environ.get('ProgramFiles(x86)')
+        if program_files:
+            # This path only exists on Windows, so the separators are fixed.
+            _default_path = f'{program_files}\\Microsoft Visual Studio\\Installer\\vswhere.exe'
+        else:
+            _default_path = None
+
+    return _default_path
+
+
+def __getattr__(name):
+    # DEFAULT_PATH is computed on first use rather than at import time.
+    if name == 'DEFAULT_PATH':
+        return _get_default_path()
+
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def _find_vswhere_path():
+    if alternate_path and os.path.isfile(alternate_path):
+        return alternate_path
+
+    default_path = _get_default_path()
+    if default_path and os.path.isfile(default_path):
+        return default_path
+
+    if os.path.isfile(DOWNLOAD_PATH):
+        return DOWNLOAD_PATH
+
+    with _download_lock:
+        # Another thread may have finished downloading while we waited.
+        if not os.path.isfile(DOWNLOAD_PATH):
+            _download_vswhere()
+
+    return DOWNLOAD_PATH
 
 
 def _download_vswhere():
     """
     Download vswhere to DOWNLOAD_PATH.
+
+    The file is downloaded to a temporary file and then moved into place, so
+    an interrupted download never leaves a truncated copy at DOWNLOAD_PATH.
     """
-    print('downloading from', _get_latest_release_url())
+    # urllib is only imported when downloading, since it is slow to import and
+    # most calls never need it.
+    from urllib.request import urlopen
+
+    url = _get_latest_release_url()
+    print('downloading from', url)
+
+    # Include the process ID so that concurrent downloads from multiple
+    # processes don't write to the same file.
+    temp_path = '%s.%d.part' % (DOWNLOAD_PATH, os.getpid())
     try:
-        from urllib.request import urlopen
-        with urlopen(_get_latest_release_url()) as response, open(DOWNLOAD_PATH, 'wb') as outfile:
-            shutil.copyfileobj(response, outfile)
-    except ImportError:
-        # Python 2
-        import urllib
-        urllib.urlretrieve(_get_latest_release_url(), DOWNLOAD_PATH)
+        with urlopen(url) as response, open(temp_path, 'wb') as outfile:
+            expected_size = response.info().get('Content-Length')
+            shutil.copyfileobj(response, outfile, DOWNLOAD_BUFFER_SIZE)
+            size = outfile.tell()
+
+        if expected_size is not None and size != int(expected_size):
+            raise Exception('Download of vswhere was incomplete. Expected %s bytes but got %d.' % (expected_size, size))
+
+        try:
+            os.replace(temp_path, DOWNLOAD_PATH)
+        except OSError:
+            # Another process may have finished downloading first. If it is
+            # already running that copy, Windows won't let us replace it, so
+            # just use it instead.
+            if not os.path.isfile(DOWNLOAD_PATH):
+                raise
+
+            os.remove(temp_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
 
 
 def _get_latest_release_url():
     """
     The the URL of the latest release of vswhere.
+
+    The URL is cached in RELEASE_CACHE_PATH along with the ETag of the GitHub
+    response, so later calls only need a conditional request, which does not
+    count against GitHub's rate limit if the release has not changed.
+
+    This is only called when vswhere.exe is missing from the package directory,
+    and RELEASE_CACHE_PATH is in that same directory. The cache therefore only
+    helps if vswhere.exe is deleted but the cache file is kept. It does not help
+    fresh installs, such as CI workers that start with a clean environment.
     """
     if download_mirror_url:
         return download_mirror_url
 
-    try:
-        from urllib.request import urlopen
-        with urlopen(LATEST_RELEASE_ENDPOINT) as response:
-            release = json.loads(response.read())
-    except ImportError:
-        # Python 2
-        import urllib2
-        response = urllib2.urlopen(LATEST_RELEASE_ENDPOINT)
-        release = json.loads(response.read(), encoding=response.headers.getparam('charset') or 'utf-8')
-
-    for asset in release['assets']:
+    cache = _read_release_cache()
+    etag = cache.get('etag') if cache.get('url') else None
+
+    result = _fetch_latest_release(etag)
+    if result is None:
+        return cache['url']
+
+    release, etag = result
+    url = _find_asset_url(release)
+    _write_release_cache({'url': url, 'etag': etag})
+    return url
+
+
+def _find_asset_url(release):
+    """
+    Get the download URL of vswhere.exe from the raw JSON for a release.
+    """
+    match = _ASSET_URL_RE.search(release)
+
+    # The regex can match a different asset's URL if browser_download_url comes
+    # before name in the JSON, so make sure it is actually the URL for vswhere.
+    if match and match.group(1).endswith(b'/vswhere.exe'):
+        return match.group(1).decode('utf-8')
+
+    # Fall back to parsing the whole release in case the response is formatted
+    # in a way the regex doesn't handle.
+    for asset in json.loads(release.decode('utf-8'))['assets']:
         if asset['name'] == 'vswhere.exe':
             return asset['browser_download_url']
 
-    raise Exception('Could not locate the latest release of vswhere.')
\ No newline at end of file
+    raise Exception('Could not locate the latest release of vswhere.')
+
+
+def _fetch_latest_release(etag=None):
+    """
+    Get the release information for the latest release of vswhere.
+
+    Returns a tuple of the release JSON as bytes and its ETag, or None if
+    `etag` is given and the release has not changed.
+    """
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    headers = {'If-None-Match': etag} if etag else {}
+
+    try:
+        response = urlopen(Request(LATEST_RELEASE_ENDPOINT, headers=headers))
+    except HTTPError as e:
+        if etag and e.code == 304:
+            return None
+        raise
+
+    with response:
+        return response.read(), response.info().get('ETag')
+
+
+def _read_release_cache():
+    try:
+        with open(RELEASE_CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return cache if isinstance(cache, dict) else {}
+
+
+def _write_release_cache(cache):
+    try:
+        with open(RELEASE_CACHE_PATH, 'w') as f:
+            json.dump(cache, f)
+    except OSError:
+        # The cache is only an optimization. Ignore it if the package
+        # directory is not writable.
+        pass